@@ -2,4 +2,12 @@
 
 __version__ = "0.1.0"
 
-from .agent import create_agent
\ No newline at end of file
+__all__ = ["create_agent"]
+
+
+def __getattr__(name):
+    # Import the agent lazily so `import smolcc` doesn't pull in smolagents
+    if name == "create_agent":
+        from .agent import create_agent
+        return create_agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
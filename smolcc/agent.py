@@ -5,21 +5,26 @@ This module provides an agent implementation that uses Rich for
 better terminal output, including spinners for long-running operations
 and formatted tool outputs.
 """
+import io
 import os
 import time
+import atexit
 import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple, Union
 
-from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn
-from rich.panel import Panel
-from rich.text import Text
-
 from smolagents import ToolCallingAgent, Tool, LogLevel, AgentLogger
-from smolcc.utils import strip_quotes
 
 from smolcc.tool_output import ToolOutput, ToolCallOutput, AssistantOutput, convert_to_tool_output
 
+# Resolved working directories, keyed by the cwd argument given to create_agent
+_CWD_CACHE: Dict[Optional[str], Path] = {}
+
+# Tool instances shared by every agent, created on first use
+_TOOLS: Optional[Tuple[Tool, ...]] = None
+
 
 class RichConsoleLogger(AgentLogger):
     """
@@ -27,16 +32,24 @@ class RichConsoleLogger(AgentLogger):
     a Rich console for enhanced display.
     """
     def __init__(self, level: LogLevel = LogLevel.INFO, log_file: Optional[str] = None):
+        from rich.console import Console
+        
         # Create the Rich console for output
-        self.console = Console()
-        super().__init__(level=level)
+        super().__init__(level=level, console=Console())
         
         # Set up file logging if requested
         self.log_file = log_file
+        self._logf = None
         if log_file:
-            # Create or truncate the log file
-            with open(log_file, "w") as f:
-                f.write("RichConsoleLogger initialized\n")
+            # Create or truncate the log file, keeping one line-buffered
+            # handle open rather than reopening it for every event
+            self._logf = open(log_file, "w", buffering=1)
+            atexit.register(self._logf.close)
+            self._logf.write("RichConsoleLogger initialized\n")
+            
+            # Reusable buffer and console for rendering Rich objects to text
+            self._cap_io = io.StringIO()
+            self._cap_console = Console(file=self._cap_io, width=120)
     
     def log(self, *args, level: int = LogLevel.INFO, **kwargs) -> None:
         """
@@ -44,35 +57,68 @@ class RichConsoleLogger(AgentLogger):
         
         We'll handle our own logging through the Rich console elsewhere.
         """
-        if self.log_file and level <= self.level:
-            with open(self.log_file, "a") as f:
-                f.write(f"LOG: {args}\n")
+        if not self._logf or level > self.level:
+            return
+        
+        # Fast path: a single plain string needs no rendering at all
+        first = args[0] if args else ""
+        if len(args) <= 1 and not kwargs and isinstance(first, str):
+            self._emit("LOG", first)
+            return
+        
+        self._emit("LOG", self._render(args, kwargs))
+    
+    def _emit(self, tag: str, content: str) -> None:
+        """
+        Write one tagged event to the log file in a single write.
+        
+        Args:
+            tag: Short event type, e.g. "LOG" or "ERR"
+            content: The event text
+        """
+        self._logf.write(f"{tag}\t{content}\n")
+    
+    def _render(self, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> str:
+        """
+        Render log arguments to plain text for the log file.
+        
+        Args:
+            args: Positional arguments passed to log()
+            kwargs: Keyword arguments passed to log()
+            
+        Returns:
+            The rendered text
+        """
+        # Plain strings need no rendering, so skip the capture console
+        if not kwargs and all(isinstance(arg, str) for arg in args):
+            return " ".join(args)
+        
+        self._cap_io.seek(0)
+        self._cap_io.truncate()
+        self._cap_console.print(*args, **kwargs)
+        return self._cap_io.getvalue().rstrip("\n")
     
     def log_error(self, error_message: str) -> None:
         """Display errors prominently."""
-        if self.log_file:
-            with open(self.log_file, "a") as f:
-                f.write(f"ERROR: {error_message}\n")
+        if self._logf:
+            self._emit("ERR", error_message)
         
         self.console.print(f"[bold red]Error:[/bold red] {error_message}")
     
     def log_task(self, content: str, subtitle: str, title: str = None, level: LogLevel = LogLevel.INFO) -> None:
         """Suppress task headers."""
-        if self.log_file and level <= self.level:
-            with open(self.log_file, "a") as f:
-                f.write(f"TASK: {content}\nSubtitle: {subtitle}\nTitle: {title}\n")
+        if self._logf and level <= self.level:
+            self._emit("TASK", f"{content}|{subtitle}|{title}")
     
     def log_rule(self, title: str, level: int = LogLevel.INFO) -> None:
         """Suppress rule dividers."""
-        if self.log_file and level <= self.level:
-            with open(self.log_file, "a") as f:
-                f.write(f"RULE: {title}\n")
+        if self._logf and level <= self.level:
+            self._emit("RULE", title)
     
     def log_markdown(self, content: str, title: str = None, level=LogLevel.INFO, style=None) -> None:
         """Suppress markdown output."""
-        if self.log_file and level <= self.level:
-            with open(self.log_file, "a") as f:
-                f.write(f"MARKDOWN: {title}\n{content}\n")
+        if self._logf and level <= self.level:
+            self._emit("MARKDOWN", f"{title}|{content}")
 
 
 class ToolAgent(ToolCallingAgent):
@@ -95,11 +141,56 @@ class ToolAgent(ToolCallingAgent):
         
         # Get the console from the logger
         self.console = self.logger.console
+        
+        # Optional Rich status shown while the model is thinking; paused
+        # during tool calls so tool output and input prompts render cleanly
+        self.status = None
+        
+        # Worker thread for background runs, created on first use
+        self._executor = None
+    
+    def run_in_background(self, user_input: str) -> Future:
+        """
+        Run the agent on a worker thread.
+        
+        The executor is created once and reused for every query.
+        
+        Args:
+            user_input: The user's input query
+            
+        Returns:
+            A Future resolving to the agent's response
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="smolcc-agent")
+        return self._executor.submit(self.run, user_input)
     
     def execute_tool_call(self, tool_name: str, tool_arguments: Dict[str, Any]) -> Any:
         """
         Execute a tool call with visual feedback.
         
+        Args:
+            tool_name: Name of the tool to execute
+            tool_arguments: Arguments to pass to the tool
+            
+        Returns:
+            The result of the tool execution
+        """
+        status = self.status
+        if status is None:
+            return self._execute_tool_call(tool_name, tool_arguments)
+        
+        # Hide the thinking status while the tool runs
+        status.stop()
+        try:
+            return self._execute_tool_call(tool_name, tool_arguments)
+        finally:
+            status.start()
+    
+    def _execute_tool_call(self, tool_name: str, tool_arguments: Dict[str, Any]) -> Any:
+        """
+        Execute a tool call and display its output.
+        
         Args:
             tool_name: Name of the tool to execute
             tool_arguments: Arguments to pass to the tool
@@ -165,6 +256,9 @@ class ToolAgent(ToolCallingAgent):
             # Run the agent
             result = super().run(user_input, stream=stream)
         except Exception as e:
+            # An interrupt requested with Ctrl-C isn't an error
+            if self.interrupt_switch:
+                return "Interrupted"
             self.logger.log_error(f"Error running agent: {str(e)}")
             return f"Error: {str(e)}"
         
@@ -190,6 +284,8 @@ class ToolAgent(ToolCallingAgent):
         Returns:
             The formatted messages for the LLM
         """
+        from rich.progress import Progress, SpinnerColumn, TextColumn
+        
         # Show a thinking spinner during LLM formatting (this is a long operation)
         with Progress(
             SpinnerColumn(),
@@ -224,10 +320,84 @@ class ToolAgent(ToolCallingAgent):
         raise ValueError(f"Tool not found: {tool_name}")
 
 
+def _get_tools() -> Tuple[Tool, ...]:
+    """
+    Get the shared tool instances, importing and creating them on first use.
+    
+    Returns:
+        A tuple with one instance of every available tool
+    """
+    global _TOOLS
+    if _TOOLS is None:
+        # Import tool modules
+        from smolcc.tools import (
+            BashTool,
+            EditTool,
+            GlobTool, 
+            GrepTool,
+            LSTool, 
+            ReplaceTool,
+            ViewTool,
+            UserInputTool
+        )
+        
+        # Create instances for all tools
+        _TOOLS = (
+            BashTool if isinstance(BashTool, Tool) else BashTool(),
+            EditTool() if not isinstance(EditTool, Tool) else EditTool,
+            GlobTool if isinstance(GlobTool, Tool) else GlobTool(),
+            GrepTool if isinstance(GrepTool, Tool) else GrepTool(),
+            LSTool if isinstance(LSTool, Tool) else LSTool(),
+            ReplaceTool() if not isinstance(ReplaceTool, Tool) else ReplaceTool,
+            ViewTool if isinstance(ViewTool, Tool) else ViewTool(),
+            UserInputTool
+        )
+    return _TOOLS
+
+
+@lru_cache(maxsize=1)
+def _get_api_key() -> Optional[str]:
+    """
+    Load environment variables and read the Anthropic API key once.
+    
+    Returns:
+        The API key, or None if it is not set
+    """
+    from dotenv import load_dotenv
+    
+    # Initialize environment variables
+    load_dotenv()
+    
+    return os.getenv("ANTHROPIC_API_KEY")
+
+
+@lru_cache(maxsize=4)
+def _build_model(system_prompt: str):
+    """
+    Create a LiteLLM model for a system prompt, reusing it for identical prompts.
+    
+    Args:
+        system_prompt: The system prompt to send with every request
+        
+    Returns:
+        A LiteLLMModel instance
+    """
+    from smolagents import LiteLLMModel
+    
+    return LiteLLMModel(
+        model_id="claude-3-7-sonnet-20250219",
+        api_key=_get_api_key(),
+        system=system_prompt
+    )
+
+
 def create_agent(cwd: Optional[str] = None, log_file: Optional[str] = "tool_agent.log") -> ToolAgent:
     """
     Create a tool agent with all available tools.
     
+    Agents are memoized per (cwd, log_file), so repeated calls with the same
+    arguments reuse the model client and system prompt instead of rebuilding them.
+    
     Args:
         cwd: Current working directory (defaults to os.getcwd())
         log_file: Path to log file or None to disable logging
@@ -235,59 +405,51 @@ def create_agent(cwd: Optional[str] = None, log_file: Optional[str] = "tool_agen
     Returns:
         A ToolAgent instance
     """
-    from dotenv import load_dotenv
-    from smolagents import LiteLLMModel
+    # Normalize the working directory so equivalent paths share a cache entry
+    return _create_agent(str(_resolve_cwd(cwd)), log_file)
 
-    # Import tool modules
-    from smolcc.tools import (
-        BashTool,
-        EditTool,
-        GlobTool, 
-        GrepTool,
-        LSTool, 
-        ReplaceTool,
-        ViewTool,
-        UserInputTool
-    )
+
+def _resolve_cwd(cwd: Optional[str]) -> Path:
+    """
+    Resolve a working directory to an absolute path, caching the result.
     
+    Args:
+        cwd: Working directory, or None for the process working directory
+        
+    Returns:
+        The resolved path
+    """
+    path = _CWD_CACHE.get(cwd)
+    if path is None:
+        path = Path(cwd or os.getcwd()).resolve()
+        _CWD_CACHE[cwd] = path
+    return path
+
+
+@lru_cache(maxsize=8)
+def _create_agent(cwd: str, log_file: Optional[str]) -> ToolAgent:
+    """
+    Build a new tool agent for a normalized working directory.
+    
+    Args:
+        cwd: Absolute path of the working directory
+        log_file: Path to log file or None to disable logging
+        
+    Returns:
+        A ToolAgent instance
+    """
     # Import system prompt utilities
     from smolcc.system_prompt import get_system_prompt
     
-    # Initialize environment variables
-    load_dotenv()
-    
-    # Use the provided working directory or current one
-    if cwd is None:
-        cwd = os.getcwd()
-    
     # Get the dynamic system prompt
     system_prompt = get_system_prompt(cwd)
     
-    # Create a model with the system prompt
-    agent_model = LiteLLMModel(
-        model_id="claude-3-7-sonnet-20250219",
-        api_key=os.getenv("ANTHROPIC_API_KEY"),
-        system=system_prompt
-    )
-    
-    # Create instances for tools if needed
-    from smolagents import Tool
-    
-    # Create instances for all tools
-    tool_instances = [
-        BashTool if isinstance(BashTool, Tool) else BashTool(),
-        EditTool() if not isinstance(EditTool, Tool) else EditTool,
-        GlobTool if isinstance(GlobTool, Tool) else GlobTool(),
-        GrepTool if isinstance(GrepTool, Tool) else GrepTool(),
-        LSTool if isinstance(LSTool, Tool) else LSTool(),
-        ReplaceTool() if not isinstance(ReplaceTool, Tool) else ReplaceTool,
-        ViewTool if isinstance(ViewTool, Tool) else ViewTool(),
-        UserInputTool
-    ]
+    # Create (or reuse) a model with the system prompt
+    agent_model = _build_model(system_prompt)
     
     # Initialize the agent with all tools
     agent = ToolAgent(
-        tools=tool_instances,
+        tools=list(_get_tools()),
         model=agent_model,
         log_file=log_file
     )
@@ -0,0 +1,254 @@
+"""
+Command line interface for SmolCC.
+
+This module provides the argument parser and entry point for the SmolCC
+agent, including the interactive mode with Rich terminal output.
+"""
+import sys
+import os
+import time
+import argparse
+from functools import lru_cache
+from typing import List, Optional
+
+from smolcc.early_input import start_capturing_early_input, drain_early_input
+
+
+@lru_cache(maxsize=1)
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the command line argument parser.
+    
+    Returns:
+        The argument parser, built once per process
+    """
+    parser = argparse.ArgumentParser(
+        description="SmolCC - A lightweight code assistant with rich terminal UI"
+    )
+    parser.add_argument(
+        "query", nargs="*", help="Query to send to Claude"
+    )
+    parser.add_argument(
+        "-i", "--interactive", action="store_true", 
+        help="Run in interactive mode (prompt for queries)"
+    )
+    parser.add_argument(
+        "--cwd", help="Set the working directory for the agent"
+    )
+    parser.add_argument(
+        "--no-log", action="store_true",
+        help="Disable logging to file"
+    )
+    parser.add_argument(
+        "--log-file", default="tool_agent.log",
+        help="Path to log file (default: tool_agent.log)"
+    )
+    return parser
+
+
+# Parser shared by every call to main()
+_PARSER = build_parser()
+
+
+def main(argv: Optional[List[str]] = None):
+    """
+    Main entry point for SmolCC.
+    Handles command line arguments and runs the agent.
+    
+    Args:
+        argv: Command line arguments (defaults to sys.argv[1:])
+    """
+    parser = _PARSER
+    args = parser.parse_args(argv)
+    
+    # Nothing to do without a query; exit before paying the agent import cost
+    if not args.interactive and not args.query:
+        parser.print_help()
+        sys.exit(1)
+    
+    # Hold on to anything typed while the agent starts up
+    if args.interactive:
+        start_capturing_early_input()
+    
+    # Import the agent only once we know it will be used
+    from smolcc.agent import create_agent
+    
+    # Set the working directory if provided
+    working_dir = args.cwd if args.cwd else os.getcwd()
+    
+    # Configure logging
+    log_file = None if args.no_log else args.log_file
+    
+    # Create the agent
+    agent = create_agent(working_dir, log_file)
+    
+    # Handle the query based on arguments
+    if args.interactive:
+        run_interactive_mode(agent, drain_early_input())
+    else:
+        query = " ".join(args.query)
+        agent.run(query)
+
+
+# Inputs that end an interactive session
+_EXIT_WORDS: frozenset = frozenset({"exit", "quit", ":q"})
+
+# Welcome banner lines and their styles, shown when interactive mode starts
+_WELCOME_LINES = (
+    ("                                                      \n", "magenta"),
+    ("                   smolCC                             \n", "bold magenta"),
+    ("                                                      \n", "magenta"),
+    ("  A lightweight code assistant for your terminal      \n", "magenta"),
+    ("  Built on smolagents with enhanced terminal UI       \n", "magenta"),
+    ("                                                      \n", "magenta"),
+    ("  • Enter queries for smolCC to help with code tasks  \n", "dim magenta"),
+    ("  • Type 'exit' or 'quit' to end the session          \n", "dim magenta"),
+    ("                                                      \n", "dim magenta"),
+    ("                                                      \n", "magenta"),
+)
+
+
+@lru_cache(maxsize=4)
+def _render_welcome(color_system: Optional[str], width: int, encoding: str) -> bytes:
+    """
+    Render the welcome banner to terminal bytes.
+    
+    Args:
+        color_system: The Rich color system of the target console
+        width: The width of the target console
+        encoding: The output encoding of the target console
+        
+    Returns:
+        The rendered banner, including ANSI styling
+    """
+    import io
+    from rich.console import Console
+    
+    buffer = io.StringIO()
+    console = Console(file=buffer, force_terminal=True, color_system=color_system, width=width)
+    console.print(_welcome_panel())
+    return buffer.getvalue().encode(encoding, errors="replace")
+
+
+def _welcome_panel():
+    """Build the Rich panel for the welcome banner."""
+    from rich.panel import Panel
+    from rich.text import Text
+    
+    welcome_text = Text.assemble(*_WELCOME_LINES)
+    return Panel(welcome_text, expand=False, border_style="magenta")
+
+
+def print_welcome(console):
+    """
+    Display the welcome banner for interactive mode.
+    
+    On a regular terminal the pre-rendered banner is written straight to
+    the file descriptor, skipping Rich's render pipeline.
+    
+    Args:
+        console: The Rich console to print to
+    """
+    try:
+        fd = console.file.fileno()
+    except (AttributeError, OSError, ValueError):
+        fd = None
+    
+    if fd is None or not console.is_terminal or console.legacy_windows:
+        console.print(_welcome_panel())
+        return
+    
+    banner = _render_welcome(console.color_system, console.width, console.encoding)
+    console.file.flush()
+    os.write(fd, banner)
+
+
+def run_interactive_mode(agent, early_input: str = ""):
+    """
+    Run SmolCC in interactive mode with enhanced UI.
+    
+    Args:
+        agent: The EnhancedToolAgent instance
+        early_input: Text typed before the first prompt was shown
+    """
+    from rich.console import Console
+    from rich.markup import escape
+    
+    console = Console()
+    
+    # Display welcome header
+    print_welcome(console)
+    
+    # Debug system prompt code removed
+    
+    while True:
+        try:
+            # Use Rich's prompt, showing any text typed during startup
+            query = console.input(f"[cyan bold]>[/cyan bold] {escape(early_input)}")
+            query = early_input + query
+            early_input = ""
+            
+            stripped = query.strip()
+            if not stripped:
+                continue
+            
+            if stripped.lower() in _EXIT_WORDS:
+                console.print("[yellow]Exiting SmolCC...[/yellow]")
+                break
+            
+            # The agent will handle displaying the result
+            run_query(agent, query)
+            
+        except KeyboardInterrupt:
+            console.print("\n[yellow]Exiting...[/yellow]")
+            break
+        except Exception as e:
+            console.print(f"[bold red]Error:[/bold red] {e}")
+
+
+def run_query(agent, query: str) -> str:
+    """
+    Run a query on the agent's worker thread while showing a thinking status.
+    
+    The main thread only polls the result, so Ctrl-C stays responsive. Ctrl-C
+    stops the query rather than the session: the agent is interrupted at its
+    next step and the prompt comes back once it has stopped. Further Ctrl-C
+    presses while it is stopping are ignored.
+    
+    Args:
+        agent: The ToolAgent instance
+        query: The query to run
+        
+    Returns:
+        The agent's response, or "Interrupted" if the query was stopped
+    """
+    future = agent.run_in_background(query)
+    
+    with agent.console.status("[yellow]Thinking...[/yellow]") as status:
+        agent.status = status
+        try:
+            while not future.done():
+                time.sleep(0.1)
+        except KeyboardInterrupt:
+            # Stop the agent at its next step if it has already started, and
+            # wait for it so no work is left running behind the prompt
+            if not future.cancel():
+                agent.interrupt()
+                status.update("[yellow]Interrupting...[/yellow]")
+                while not future.done():
+                    try:
+                        time.sleep(0.1)
+                    except KeyboardInterrupt:
+                        # Already stopping; leaving now would only block exit
+                        # on the worker until its current step finishes
+                        pass
+            agent.console.print("[yellow]Interrupted.[/yellow]")
+            return "Interrupted"
+        finally:
+            agent.status = None
+    
+    return future.result()
+
+
+if __name__ == "__main__":
+    main()
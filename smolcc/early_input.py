@@ -0,0 +1,121 @@
+"""
+Early input capture for SmolCC.
+
+Agent startup takes a noticeable moment, and anything typed before the first
+prompt appears would otherwise be echoed over the startup output. This module
+captures those keystrokes in the background so they can be handed to the
+first prompt instead.
+"""
+import os
+import re
+import sys
+import atexit
+import select
+import threading
+from typing import Optional
+
+try:
+    import termios
+    import tty
+except ImportError:  # Not available on Windows
+    termios = None
+    tty = None
+
+# Terminal escape sequences sent by arrow, function and Alt-modified keys:
+# CSI (ESC [ ... final byte), SS3 (ESC O x), or ESC followed by one character
+_ESCAPE_SEQUENCE_RE = re.compile(r'\x1b(?:\[[0-?]*[ -/]*[@-~]|O.|.)?', re.DOTALL)
+
+_buffer = bytearray()
+_stop_event: Optional[threading.Event] = None
+_thread: Optional[threading.Thread] = None
+_saved_attrs = None
+
+
+def _capture_loop(fd: int, stop_event: threading.Event) -> None:
+    """Read keystrokes from fd into the buffer until asked to stop."""
+    while not stop_event.is_set():
+        try:
+            readable, _, _ = select.select([fd], [], [], 0.05)
+            if readable:
+                chunk = os.read(fd, 4096)
+                if not chunk:
+                    break
+                _buffer.extend(chunk)
+        except (OSError, ValueError):
+            break
+
+
+def _restore_terminal() -> None:
+    """Restore the terminal attributes saved when capture started."""
+    global _saved_attrs
+    if _saved_attrs is not None:
+        try:
+            termios.tcsetattr(sys.stdin.fileno(), termios.TCSADRAIN, _saved_attrs)
+        except (OSError, termios.error):
+            pass
+        _saved_attrs = None
+
+
+def start_capturing_early_input() -> None:
+    """
+    Start capturing keystrokes typed before the first prompt.
+
+    Does nothing if stdin is not a terminal or the platform lacks termios.
+    """
+    global _stop_event, _thread, _saved_attrs
+
+    if termios is None or _thread is not None or not sys.stdin.isatty():
+        return
+
+    fd = sys.stdin.fileno()
+    try:
+        _saved_attrs = termios.tcgetattr(fd)
+        # Character-at-a-time reads with echo off, so keystrokes don't
+        # land in the middle of startup output
+        tty.setcbreak(fd)
+    except (OSError, termios.error):
+        _saved_attrs = None
+        return
+
+    # Make sure a crash during startup doesn't leave the terminal in cbreak mode
+    atexit.register(_restore_terminal)
+
+    _stop_event = threading.Event()
+    _thread = threading.Thread(target=_capture_loop, args=(fd, _stop_event), daemon=True)
+    _thread.start()
+
+
+def drain_early_input() -> str:
+    """
+    Stop capturing, restore the terminal and return what was typed.
+
+    Returns:
+        The captured text, or an empty string if nothing was captured
+    """
+    global _stop_event, _thread
+
+    if _thread is not None:
+        _stop_event.set()
+        _thread.join()
+        _thread = None
+        _stop_event = None
+
+    _restore_terminal()
+
+    text = _buffer.decode("utf-8", errors="replace")
+    _buffer.clear()
+    
+    # Drop whole key sequences, not just their ESC, so an arrow key doesn't
+    # leave "[A" behind
+    text = _ESCAPE_SEQUENCE_RE.sub("", text)
+
+    # Apply backspaces and keep only printable text; a stray Enter
+    # shouldn't submit the first prompt
+    chars = []
+    for ch in text:
+        if ch in ("\x7f", "\b"):
+            if chars:
+                chars.pop()
+        elif ch.isprintable():
+            chars.append(ch)
+    return "".join(chars)
@@ -3,6 +3,7 @@ import datetime
 import platform
 import json
 import subprocess
+from functools import lru_cache
 from pathlib import Path
 
 
@@ -124,8 +125,14 @@ def is_git_repo(path):
         return False
 
 
+@lru_cache(maxsize=None)
 def get_system_prompt(cwd=None):
-    """Generate the system prompt with dynamic values filled in."""
+    """
+    Generate the system prompt with dynamic values filled in.
+    
+    The result is cached per cwd, so the directory walk and git queries
+    only run once per working directory for the life of the process.
+    """
     if cwd is None:
         cwd = os.getcwd()
     
@@ -0,0 +1,3 @@
+"""
+Test package for SmolCC itself (outside the tools).
+"""
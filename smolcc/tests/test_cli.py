@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the SmolCC command line interface.
+"""
+
+import io
+import sys
+import unittest
+from concurrent.futures import Future
+from contextlib import redirect_stdout
+from unittest import mock
+
+from rich.console import Console
+
+from smolcc import cli
+
+
+class CliTests(unittest.TestCase):
+    """Tests for cli.main."""
+
+    def test_main_uses_argv_argument(self):
+        """Test that main() parses the arguments it is given, not sys.argv."""
+        with mock.patch.object(sys, "argv", ["smolcc", "--bogus"]), \
+                mock.patch("smolcc.agent.create_agent") as create_agent:
+            cli.main(["hello", "world", "--no-log", "--cwd", "/tmp"])
+
+        create_agent.assert_called_once_with("/tmp", None)
+        create_agent.return_value.run.assert_called_once_with("hello world")
+
+    def test_main_without_query_prints_help(self):
+        """Test that main() exits with usage when there is nothing to do."""
+        with mock.patch.object(sys, "argv", ["smolcc", "hello"]), \
+                redirect_stdout(io.StringIO()) as output:
+            with self.assertRaises(SystemExit) as context:
+                cli.main([])
+
+        self.assertEqual(context.exception.code, 1)
+        self.assertIn("usage:", output.getvalue())
+
+
+class FakeAgent:
+    """Agent stand-in whose background run only finishes once interrupted."""
+
+    def __init__(self):
+        self.console = Console(file=io.StringIO())
+        self.status = None
+        self.future = Future()
+        self.future.set_running_or_notify_cancel()
+
+    def run_in_background(self, query):
+        return self.future
+
+    def interrupt(self):
+        self.future.set_result("Interrupted")
+
+
+class RunQueryTests(unittest.TestCase):
+    """Tests for cli.run_query."""
+
+    def test_ctrl_c_interrupts_query_and_returns(self):
+        """Test that Ctrl-C stops the running query and waits for it."""
+        agent = FakeAgent()
+        sleep_calls = []
+
+        def fake_sleep(seconds):
+            # Press Ctrl-C the first time the main thread polls
+            sleep_calls.append(seconds)
+            if len(sleep_calls) == 1:
+                raise KeyboardInterrupt
+
+        with mock.patch.object(cli.time, "sleep", fake_sleep):
+            result = cli.run_query(agent, "hello")
+
+        self.assertEqual(result, "Interrupted")
+        self.assertTrue(agent.future.done())
+        self.assertIsNone(agent.status)
+
+    def test_repeated_ctrl_c_keeps_waiting(self):
+        """Test that Ctrl-C while the query is stopping doesn't leave run_query."""
+        agent = FakeAgent()
+        agent.interrupt = mock.Mock()
+        sleep_calls = []
+
+        def fake_sleep(seconds):
+            # Ctrl-C twice, then let the interrupted step finish
+            sleep_calls.append(seconds)
+            if len(sleep_calls) <= 2:
+                raise KeyboardInterrupt
+            agent.future.set_result("Interrupted")
+
+        with mock.patch.object(cli.time, "sleep", fake_sleep):
+            result = cli.run_query(agent, "hello")
+
+        self.assertEqual(result, "Interrupted")
+        agent.interrupt.assert_called_once_with()
+        self.assertTrue(agent.future.done())
+
+
+if __name__ == "__main__":
+    unittest.main()
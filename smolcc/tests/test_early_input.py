@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Unit tests for early input capture.
+"""
+
+import unittest
+
+from smolcc import early_input
+
+
+class DrainEarlyInputTests(unittest.TestCase):
+    """Tests for early_input.drain_early_input."""
+
+    def drain(self, data: bytes) -> str:
+        """Drain the given bytes as if they had been typed during startup."""
+        early_input._buffer.extend(data)
+        return early_input.drain_early_input()
+
+    def test_backspace_and_enter(self):
+        """Test that backspaces are applied and a stray Enter is dropped."""
+        self.assertEqual(self.drain(b"helo\x7flo\n"), "hello")
+
+    def test_escape_sequences_are_dropped(self):
+        """Test that arrow, function and Alt keys leave nothing behind."""
+        self.assertEqual(self.drain(b"ab\x1b[A\x1b[1;5C\x1bOP\x1bxcd\x1b"), "abcd")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,12 +7,14 @@ rich output objects for better display in the terminal.
 
 import os
 import re
+import selectors
 import subprocess
 import shlex
 import time
+import uuid
 import threading
 import signal
-from typing import Optional, Dict, Any, Union, Tuple
+from typing import Optional, Dict, Any, List, Union, Tuple
 
 from smolagents import Tool
 from smolcc.tool_output import ToolOutput, CodeOutput, TextOutput
@@ -21,11 +23,30 @@ from smolcc.tool_output import ToolOutput, CodeOutput, TextOutput
 DEFAULT_TIMEOUT = 1800000  # 30 minutes in milliseconds
 MAX_TIMEOUT = 600000  # 10 minutes in milliseconds
 MAX_OUTPUT_CHARS = 30000
+MAX_OUTPUT_BYTES = MAX_OUTPUT_CHARS * 4  # Enough UTF-8 bytes for MAX_OUTPUT_CHARS characters
+READ_CHUNK_SIZE = 65536  # Bytes to read from the shell pipes at a time
 BANNED_COMMANDS = [
     "alias", "curl", "curlie", "wget", "axel", "aria2c", "nc", "telnet", 
     "lynx", "w3m", "links", "httpie", "xh", "http-prompt", "chrome", 
     "firefox", "safari"
 ]
+BANNED_COMMAND_NAMES = frozenset(cmd.lower() for cmd in BANNED_COMMANDS)
+# Characters that end one command and start another (|, &&, ;, $(...), `...`)
+COMMAND_SEPARATOR_CHARS = frozenset("();|&`")
+# Shell keywords after which the next word is still a command name
+COMMAND_KEYWORDS = frozenset({"!", "if", "then", "elif", "else", "while", "until", "do", "time", "function", "coproc"})
+# Redirection operators (<, >, >>, 2>, &>, <<, <<<, >&, ...); the word after one is its target
+REDIRECTION_RE = re.compile(r'&?[<>]+[&|]?')
+# Commands that run other commands or shell code given as arguments; each of
+# their arguments is checked as a command in its own right
+COMMAND_WRAPPERS = frozenset({
+    "sudo", "doas", "su", "env", "exec", "command", "builtin", "nohup", "nice",
+    "ionice", "setsid", "flock", "chroot", "xargs", "parallel", "find", "fd",
+    "timeout", "watch", "stdbuf", "strace", "busybox", "ssh",
+    "sh", "bash", "zsh", "dash", "ksh", "eval"
+})
+# A leading VAR=value assignment before a command name
+ENV_ASSIGNMENT_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_]*=')
 
 
 class BashTool(Tool):
@@ -42,27 +63,40 @@ class BashTool(Tool):
     output_type = "string"
     
     def __init__(self):
-        """Initialize the EnhancedBashTool with a persistent shell process."""
+        """Initialize the EnhancedBashTool; the shell is started on first use."""
         super().__init__()
         self.shell = None
         self.shell_process = None
-        self._initialize_shell()
     
     def _initialize_shell(self):
         """Start a persistent shell session."""
-        # Create a persistent bash process
+        # Release the selector of a previous shell, if any
+        if getattr(self, "_selector", None) is not None:
+            self._selector.close()
+        
+        # Create a persistent bash process. The pipes are unbuffered binary
+        # pipes, written and read directly with os.write/os.read.
         self.shell_process = subprocess.Popen(
             ["/bin/bash"],
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
-            universal_newlines=True
+            bufsize=0
         )
         
-        # Set up a unique marker for command output separation
-        self.output_marker = f"__COMMAND_OUTPUT_MARKER_{int(time.time())}_"
+        # Wait on stdout and stderr together; the key data marks stderr
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self.shell_process.stdout, selectors.EVENT_READ, False)
+        self._selector.register(self.shell_process.stderr, selectors.EVENT_READ, True)
+        
+        # Set up a unique marker for command output separation. Each marker
+        # line also carries the command's sequence number and exit code.
+        self.output_marker = f"__COMMAND_OUTPUT_MARKER_{uuid.uuid4().hex}_"
+        self._marker_bytes = self.output_marker.encode()
+        self._marker_re = re.compile(re.escape(self._marker_bytes) + rb"(\d+)_(-?\d+)__END__\n")
+        self._marker_window = len(self.output_marker) + 64
+        self._command_id = 0
+        self.last_exit_code = None
     
     def forward(self, command: str, timeout: Optional[int] = None) -> Union[ToolOutput, str]:
         """
@@ -75,14 +109,14 @@ class BashTool(Tool):
         Returns:
             A ToolOutput object for rich display
         """
-        # Check if shell process is alive, restart if needed
-        if self.shell_process is None or self.shell_process.poll() is not None:
-            self._initialize_shell()
-        
         # Security check for banned commands
         if self._is_banned_command(command):
             return TextOutput(f"Error: Command contains one or more banned commands: {', '.join(BANNED_COMMANDS)}. Please use alternative tools for these operations.")
         
+        # Start the shell on first use, or restart it if it has exited
+        if self.shell_process is None or self.shell_process.poll() is not None:
+            self._initialize_shell()
+        
         # Set timeout
         if timeout is None:
             timeout_ms = DEFAULT_TIMEOUT
@@ -116,55 +150,81 @@ class BashTool(Tool):
         Returns:
             Tuple of (command output, is_error)
         """
-        # Add echo commands to mark the beginning and end of output
-        full_command = f"{command}; echo {self.output_marker}\n"
+        # Echo a marker with the exit code once the command finishes. It goes
+        # on its own line so a trailing comment in the command can't hide it.
+        self._command_id += 1
+        command_id = self._command_id
+        full_command = f"{command}\necho {self.output_marker}{command_id}_$?__END__\n"
         
         # Send the command to the shell process
-        self.shell_process.stdin.write(full_command)
-        self.shell_process.stdin.flush()
+        self._write_to_shell(full_command.encode("utf-8"))
         
         # Read output until we get to our marker
-        stdout_lines = []
-        stderr_lines = []
+        stdout_buffer = bytearray()
+        stderr_buffer = bytearray()
+        truncated_output = None
+        exit_code = None
         start_time = time.time()
         
         while True:
             # Check if we've exceeded the timeout
-            if time.time() - start_time > timeout_sec:
+            remaining = timeout_sec - (time.time() - start_time)
+            if remaining <= 0:
+                self.last_exit_code = None
                 self._kill_current_command()
                 return f"Command timed out after {timeout_sec} seconds", True
             
-            # Try to read a line from stdout or stderr
-            output_line, is_stderr = self._read_line_nonblocking_with_source()
-            if output_line is None:
-                # No data available, sleep a bit and try again
-                time.sleep(0.1)
-                continue
+            # Wait for output on either stream, up to the remaining time budget
+            chunks = self._read_available(remaining)
+            if chunks is None:
+                # Reap the dead shell so the next command starts a fresh one
+                self.last_exit_code = None
+                self._discard_shell()
+                return "Error: The shell process exited unexpectedly", True
             
-            # Check if we've reached our marker
-            if self.output_marker in output_line:
-                break
+            # Only the newly read output (plus enough to span a split marker)
+            # needs searching
+            search_from = max(0, len(stdout_buffer) - self._marker_window)
+            for data, is_stderr in chunks:
+                if not is_stderr:
+                    stdout_buffer += data
+                elif truncated_output is None and len(stderr_buffer) <= MAX_OUTPUT_BYTES:
+                    stderr_buffer += data
             
-            # Add the line to our output (separate stdout and stderr)
-            if is_stderr:
-                stderr_lines.append(output_line)
-            else:
-                stdout_lines.append(output_line)
+            match = self._find_marker(stdout_buffer, search_from)
+            while match and int(match.group(1)) != command_id:
+                # Marker from an earlier command that timed out; drop its output
+                del stdout_buffer[:match.end()]
+                match = self._find_marker(stdout_buffer, 0)
             
-            # Check if we've exceeded the max output size
-            total_length = sum(len(line) for line in stdout_lines) + sum(len(line) for line in stderr_lines)
-            if total_length > MAX_OUTPUT_CHARS:
-                # Truncate in the middle
-                stdout_text = "".join(stdout_lines)
-                stdout_lines = [self._format_truncated_output(stdout_text)]
-                # Continue reading until we find the marker, but don't save more output
-                while self.output_marker not in self._read_line_blocking():
-                    pass
+            if match:
+                exit_code = int(match.group(2))
+                del stdout_buffer[match.start():]
                 break
+            
+            # Check if we've exceeded the max output size. The limit is in
+            # characters, so multibyte output can pass it in bytes first.
+            if truncated_output is None and len(stdout_buffer) > MAX_OUTPUT_CHARS:
+                stdout_text = self._decode_output(stdout_buffer)
+                if len(stdout_text) > MAX_OUTPUT_CHARS:
+                    # Truncate in the middle
+                    truncated_output = self._format_truncated_output(stdout_text)
+            
+            if truncated_output is not None:
+                # Continue reading until we find the marker, but only keep
+                # enough output to spot it
+                del stdout_buffer[:-self._marker_window]
         
-        # Combine all output lines
-        stdout = "".join(stdout_lines)
-        stderr = "".join(stderr_lines)
+        self.last_exit_code = exit_code
+        
+        # Pick up any stderr output that arrived alongside the marker
+        for data, is_stderr in self._read_available(0) or []:
+            if is_stderr and truncated_output is None and len(stderr_buffer) <= MAX_OUTPUT_BYTES:
+                stderr_buffer += data
+        
+        # Decode all output
+        stdout = truncated_output if truncated_output is not None else self._decode_output(stdout_buffer)
+        stderr = self._decode_output(stderr_buffer)
         
         # remove trailing newline if present
         stdout = stdout.rstrip('\n')
@@ -176,43 +236,98 @@ class BashTool(Tool):
         
         # If there's stderr content, combine them appropriately
         if stderr:
-            return self._format_result_with_stderr(stdout, stderr), True
+            result = self._format_result_with_stderr(stdout, stderr)
+            # stderr alone, or on top of truncated stdout, can pass the limit
+            if len(result) > MAX_OUTPUT_CHARS:
+                result = self._format_truncated_output(result)
+            return result, True
             
-        return stdout, False
+        return stdout, exit_code != 0
     
-    def _read_line_nonblocking_with_source(self) -> Tuple[Optional[str], bool]:
+    def _find_marker(self, buffer: bytearray, start: int) -> Optional[re.Match]:
         """
-        Try to read a line from stdout or stderr without blocking.
-        Also returns whether the line came from stderr.
+        Find the first complete marker line in the buffer.
+        
+        The literal marker is located with bytes.find, which is much faster
+        than a regex scan over large output; the regex only runs where the
+        marker actually occurs.
         
+        Args:
+            buffer: The output read so far
+            start: The offset to start searching from
+            
         Returns:
-            A tuple of (line of output or None, is_stderr)
+            The marker match, or None if no complete marker line was found
+        """
+        position = buffer.find(self._marker_bytes, start)
+        while position >= 0:
+            match = self._marker_re.match(buffer, position)
+            if match:
+                return match
+            position = buffer.find(self._marker_bytes, position + 1)
+        return None
+    
+    def _write_to_shell(self, data: bytes) -> None:
         """
-        # Check if there's data available on stdout
-        if self.shell_process.stdout.readable():
-            line = self.shell_process.stdout.readline()
-            if line:
-                return line, False
-        
-        # Check if there's data available on stderr
-        if self.shell_process.stderr.readable():
-            line = self.shell_process.stderr.readline()
-            if line:
-                return line, True
-        
-        return None, False
+        Write data to the shell's stdin without any Python-level buffering.
+        
+        Args:
+            data: The bytes to write
+        """
+        fd = self.shell_process.stdin.fileno()
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
     
-    def _read_line_blocking(self) -> str:
+    def _decode_output(self, data: bytes) -> str:
         """
-        Read a line from stdout or stderr, blocking until data is available.
+        Decode raw shell output, normalizing newlines like a text-mode pipe.
         
+        Args:
+            data: The raw output bytes
+            
         Returns:
-            A line of output
+            The decoded output
         """
-        line = self.shell_process.stdout.readline()
-        if not line:
-            line = self.shell_process.stderr.readline()
-        return line
+        text = data.decode("utf-8", errors="replace")
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return text
+    
+    def _read_available(self, timeout: float) -> Optional[List[Tuple[bytes, bool]]]:
+        """
+        Wait for output on stdout or stderr and read whatever is available.
+        
+        Args:
+            timeout: Maximum time to wait in seconds
+            
+        Returns:
+            A list of (data, is_stderr) chunks, empty if nothing arrived in
+            time, or None if the shell has closed both streams
+        """
+        if not self._selector.get_map():
+            return None
+        
+        chunks = []
+        for key, _ in self._selector.select(timeout):
+            data = os.read(key.fd, READ_CHUNK_SIZE)
+            if not data:
+                # The shell closed this stream
+                self._selector.unregister(key.fileobj)
+                continue
+            chunks.append((data, key.data))
+        return chunks
+    
+    def _discard_shell(self):
+        """Wait for a shell that has closed its output streams and forget it."""
+        try:
+            self.shell_process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            # It closed its streams but kept running; don't leave it behind
+            self.shell_process.kill()
+            self.shell_process.wait()
+        self.shell_process = None
     
     def _kill_current_command(self):
         """
@@ -230,31 +345,81 @@ class BashTool(Tool):
     
     def _is_banned_command(self, command: str) -> bool:
         """
-        Check if a command contains any banned commands.
+        Check if a command runs any banned commands.
+        
+        Only words in command position are checked, so a banned name that
+        is merely an argument (e.g. ``grep curl notes.txt``) is allowed.
         
         Args:
             command: The command to check
             
         Returns:
-            True if the command contains a banned command, False otherwise
+            True if the command runs a banned command, False otherwise
         """
-        # Split the command into tokens
+        # Split the command into words and operators; newlines separate commands
         try:
-            tokens = shlex.split(command)
+            lexer = shlex.shlex(command.replace('\n', ';'), posix=True, punctuation_chars='();<>|&`')
+            lexer.whitespace_split = True
+            tokens = list(lexer)
+        except ValueError:
+            # If we can't parse the command, be conservative and allow it
+            # (the shell will fail if it's invalid syntax anyway)
+            return False
+        
+        at_command = True
+        check_arguments = False
+        skip_options = False
+        redirect_target = False
+        for index, token in enumerate(tokens):
+            # A group opened with { (including a function body) or a process
+            # substitution <(...) starts a new command
+            if token in ("{", "<(", ">(") or set(token) <= COMMAND_SEPARATOR_CHARS:
+                at_command = True
+                check_arguments = False
+                redirect_target = False
+                continue
             
-            # Check each token against the banned commands list
-            for token in tokens:
-                if token in BANNED_COMMANDS:
+            # Redirections can come before the command name (>out curl);
+            # skip the operator, its target and a leading fd number
+            if REDIRECTION_RE.fullmatch(token):
+                redirect_target = True
+                continue
+            if redirect_target:
+                redirect_target = False
+                if ('$(' in token or '`' in token) and self._is_banned_command(token):
                     return True
-                
-                # Also check for commands with paths
-                cmd_name = os.path.basename(token)
-                if cmd_name in BANNED_COMMANDS:
+                continue
+            if token.isdigit() and index + 1 < len(tokens) and REDIRECTION_RE.fullmatch(tokens[index + 1]):
+                continue
+            
+            if check_arguments:
+                # Wrapper arguments may be commands (sudo curl, find -exec curl)
+                # or shell code (bash -c "curl ...", ssh host "curl ...")
+                if self._is_banned_command(token):
                     return True
-        except Exception:
-            # If we can't parse the command, be conservative and allow it
-            # (the shell will fail if it's invalid syntax anyway)
-            pass
+                continue
+            
+            if not at_command:
+                # Command substitutions can hide inside quoted arguments
+                if ('$(' in token or '`' in token) and self._is_banned_command(token):
+                    return True
+                continue
+            
+            # Options to time (time -p curl) come before the command name
+            if skip_options and token.startswith('-'):
+                continue
+            skip_options = token == "time"
+            
+            if token in COMMAND_KEYWORDS or ENV_ASSIGNMENT_RE.match(token):
+                continue
+            
+            # Compare ignoring case and any leading path (e.g. /usr/bin/curl)
+            name = os.path.basename(token).lower()
+            if name in BANNED_COMMAND_NAMES:
+                return True
+            
+            check_arguments = name in COMMAND_WRAPPERS
+            at_command = False
         
         return False
     
@@ -388,9 +553,8 @@ class BashTool(Tool):
         start = content[:half_length]
         end = content[-half_length:]
         
-        # Count how many lines were truncated in the middle
-        middle_content = content[half_length:-half_length]
-        truncated_lines = middle_content.count('\n')
+        # Count how many lines were truncated in the middle, without copying them
+        truncated_lines = content.count('\n', half_length, len(content) - half_length)
         
         truncated = f"{start}\n\n... [{truncated_lines} lines truncated] ...\n\n{end}"
         return truncated
@@ -6,8 +6,14 @@ It supports replacing specific text strings within files and creating new files.
 """
 
 import os
+import stat
+import tempfile
+import codecs
 import difflib
-from typing import Optional, Dict, Any
+import collections
+import itertools
+import mmap
+from typing import Optional, Dict, Any, Iterable, Sequence, Tuple
 from pathlib import Path
 
 from smolagents import Tool
@@ -15,6 +21,10 @@ from smolagents import Tool
 # Constants
 MAX_DIFF_SIZE = 50000  # Maximum diff size in characters
 DIFF_TRUNCATION_MESSAGE = "(Diff output truncated due to size)"
+SNIPPET_CONTEXT_LINES = 4  # Lines of context shown before/after an edit
+MMAP_EDIT_MIN_SIZE = 1048576  # Edit files at least this many bytes through a memory map
+MMAP_COUNT_BLOCK_SIZE = 1048576  # Bytes of a memory map copied at a time when counting lines
+ENCODING_CACHE_SIZE = 128  # Number of files whose detected encoding is remembered
 
 
 class FileEditTool(Tool):
@@ -99,6 +109,12 @@ GENERAL EDITING GUIDELINES
     }
     output_type = "string"
     
+    def __init__(self):
+        """Initialize the FileEditTool with an empty encoding cache."""
+        super().__init__()
+        # Maps (path, mtime_ns, size) to the encoding detected for that file
+        self._encoding_cache: "collections.OrderedDict[Tuple[str, int, int], str]" = collections.OrderedDict()
+    
     def forward(self, file_path: str, old_string: str, new_string: str) -> str:
         """
         Edit a file by replacing old_string with new_string.
@@ -115,8 +131,15 @@ GENERAL EDITING GUIDELINES
         if not os.path.isabs(file_path):
             file_path = os.path.abspath(file_path)
         
+        # Stat the path once and derive the existence and type checks from it
+        try:
+            file_stat = os.stat(file_path)
+        except OSError:
+            # Missing, under a non-directory, or not reachable; all count as absent
+            file_stat = None
+        
         # Check if we're creating a new file
-        is_new_file = not os.path.exists(file_path) and old_string == ""
+        is_new_file = file_stat is None and old_string == ""
         
         # If creating a new file, ensure parent directory exists
         if is_new_file:
@@ -131,15 +154,18 @@ GENERAL EDITING GUIDELINES
                     
                 # For new files, directly create a formatted snippet from the new content
                 # Instead of using _get_snippet which might produce duplication
-                return f"The file {file_path} has been updated. Here's the result of running `cat -n` on a snippet of the edited file:\n{self._add_line_numbers(new_string)}"
+                # Only the first lines are shown, so only split off that many
+                max_lines = SNIPPET_CONTEXT_LINES * 2
+                snippet_lines = new_string.split('\n', max_lines)[:max_lines]
+                return f"The file {file_path} has been updated. Here's the result of running `cat -n` on a snippet of the edited file:\n{self._add_line_numbers_to_lines(snippet_lines)}"
             except Exception as e:
                 return f"Error creating file '{file_path}': {str(e)}"
         
         # For existing files, check if file exists
-        if not os.path.exists(file_path):
+        if file_stat is None:
             return f"Error: File '{file_path}' does not exist"
         
-        if not os.path.isfile(file_path):
+        if not stat.S_ISREG(file_stat.st_mode):
             return f"Error: Path '{file_path}' is not a file"
         
         # Check if file is writable
@@ -148,19 +174,13 @@ GENERAL EDITING GUIDELINES
         
         # Read the file content
         try:
-            encodings = ['utf-8', 'latin-1', 'cp1252']
-            file_content = None
-            
-            for encoding in encodings:
-                try:
-                    with open(file_path, 'r', encoding=encoding) as f:
-                        file_content = f.read()
-                    break
-                except UnicodeDecodeError:
-                    continue
+            # Large files are searched and rewritten as bytes, without decoding them
+            if old_string and file_stat.st_size >= MMAP_EDIT_MIN_SIZE:
+                result = self._edit_mapped(file_path, old_string, new_string, file_stat)
+                if result is not None:
+                    return result
             
-            if file_content is None:
-                return f"Error: Could not decode the file with any supported encoding"
+            file_content, encoding = self._read_file(file_path, file_stat)
             
             # Special handling for empty old_string
             if old_string == "":
@@ -168,109 +188,380 @@ GENERAL EDITING GUIDELINES
                 # 1. Create a new file (handled above in is_new_file case)
                 # 2. Append to an existing file (handled here)
                 new_content = file_content + new_string
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(new_content)
+                self._write_file(file_path, new_content, encoding, file_stat)
                     
-                # Get a snippet of the modified file
-                snippet = self._get_snippet(new_content, "", new_string)
-                return self._format_result(file_path, snippet)
+                # Get a snippet of the modified file around the appended text
+                snippet, start_line = self._get_snippet(new_content, len(file_content), new_string)
+                return self._format_result(file_path, snippet, start_line)
             
-            # For non-empty old_string, check if it's in the file
-            if old_string not in file_content:
+            # For non-empty old_string, find where it is in the file
+            edit_offset = file_content.find(old_string)
+            if edit_offset < 0:
                 return f"Error: The specified text was not found in the file"
             
-            # Count occurrences (only for non-empty strings)
-            occurrences = file_content.count(old_string)
-            if occurrences > 1:
+            # Look for a second occurrence; only count them all when reporting the error
+            if file_content.find(old_string, edit_offset + len(old_string)) >= 0:
+                occurrences = file_content.count(old_string)
                 return f"Error: The specified text appears {occurrences} times in the file. Please provide more context to uniquely identify which instance to replace."
             
             # Replace the text
-            new_content = file_content.replace(old_string, new_string, 1)
+            new_content = file_content[:edit_offset] + new_string + file_content[edit_offset + len(old_string):]
             
             # Write the changed content back to the file
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(new_content)
+            self._write_file(file_path, new_content, encoding, file_stat)
             
             # Get a snippet of the modified file with line numbers (OpenAGI format)
-            snippet = self._get_snippet(new_content, old_string, new_string)
+            snippet, start_line = self._get_snippet(new_content, edit_offset, new_string)
             
             # Return success message with snippet of edited file
-            return self._format_result(file_path, snippet)
+            return self._format_result(file_path, snippet, start_line)
             
         except Exception as e:
             return f"Error editing file '{file_path}': {str(e)}"
     
-    def _get_snippet(self, new_content: str, old_string: str, new_string: str) -> str:
+    def _edit_mapped(self, file_path: str, old_string: str, new_string: str, file_stat: os.stat_result) -> Optional[str]:
         """
-        Get a snippet of the modified file around the edit point.
+        Replace old_string in a large file by searching a memory map of it.
+        
+        The file is still read in full by the searches and the copy, but it
+        is never decoded to a str or re-encoded: the bytes around the edit
+        are copied to the new file as they are, and only the lines shown in
+        the snippet are decoded. ASCII text is encoded the same way in every encoding
+        _read_file can pick, so the fast path is limited to ASCII edits on
+        files without carriage returns; anything else returns None and goes
+        through the regular path.
         
         Args:
-            new_content: The content of the modified file
-            old_string: The string that was replaced
-            new_string: The string that replaced it
+            file_path: The absolute path to the file to modify
+            old_string: The text to replace
+            new_string: The text to replace it with
+            file_stat: The result of os.stat on the file
             
         Returns:
-            A snippet of the modified file as a string with line numbers
+            The result message, or None if the edit needs the regular path
         """
-        # Number of context lines before/after the change
-        n_lines_snippet = 4
-        
-        # For new files or if old_string is empty
-        if old_string == "":
-            # Just return the first few lines of the new content
-            new_lines = new_content.split('\n')
-            max_lines = min(len(new_lines), n_lines_snippet * 2)
-            return '\n'.join(new_lines[:max_lines])
+        if not (old_string.isascii() and new_string.isascii()):
+            return None
+        
+        # Rewriting in place would truncate the file while it is mapped
+        if not self._can_replace(os.path.realpath(file_path), file_stat):
+            return None
+        
+        needle = old_string.encode('ascii')
+        replacement = new_string.encode('ascii')
+        
+        with open(file_path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        with mm:
+            # Missing and duplicate matches are reported by the regular path
+            edit_offset = mm.find(needle)
+            if edit_offset < 0 or mm.find(needle, edit_offset + len(needle)) >= 0:
+                return None
+            
+            # The regular path would normalize carriage returns across the whole file
+            if mm.find(b'\r') >= 0:
+                return None
+            
+            tail_offset = edit_offset + len(needle)
+            with memoryview(mm) as view:
+                new_stat = self._replace_file(file_path, file_stat, (view[:edit_offset], replacement, view[tail_offset:]),
+                                              in_place_fallback=False)
+            if new_stat is None:
+                return None
+            
+            # Build the snippet from the lines around the edit only
+            start = edit_offset
+            for _ in range(SNIPPET_CONTEXT_LINES + 1):
+                start = mm.rfind(b'\n', 0, start)
+                if start < 0:
+                    break
+            start += 1
             
-        # Find the position of the old string in the original content
-        lines = new_content.split('\n')
+            end = tail_offset - 1
+            for _ in range(SNIPPET_CONTEXT_LINES + 1):
+                end = mm.find(b'\n', end + 1)
+                if end < 0:
+                    end = len(mm)
+                    break
+            
+            lines_before = self._count_newlines(mm, start)
+            head = self._decode_for_display(mm[start:edit_offset])
+            tail = self._decode_for_display(mm[tail_offset:end])
         
-        # We need to find approximately where the edit happened
-        # For simplicity, let's just show the whole file if it's short enough
-        if len(lines) <= n_lines_snippet * 2:
-            return new_content
+        snippet, start_line = self._get_snippet(head + new_string + tail, len(head), new_string)
+        return self._format_result(file_path, snippet, lines_before + start_line)
+    
+    def _count_newlines(self, mm: mmap.mmap, end: int) -> int:
+        """
+        Count the newlines before an offset in a memory map.
+        
+        The map is counted a block at a time so the prefix is never copied
+        out as a whole.
+        
+        Args:
+            mm: The memory map to count in
+            end: The offset to count up to
             
-        # Otherwise, try to find a window around the edit
-        # This is an approximation - in a real implementation we'd need to 
-        # do more sophisticated diffing to find the exact location
+        Returns:
+            The number of newlines in mm[:end]
+        """
+        count = 0
+        for offset in range(0, end, MMAP_COUNT_BLOCK_SIZE):
+            count += mm[offset:min(offset + MMAP_COUNT_BLOCK_SIZE, end)].count(b'\n')
+        return count
+    
+    def _decode_for_display(self, data: bytes) -> str:
+        """
+        Decode part of a file for a snippet, falling back like _read_file does.
+        
+        Args:
+            data: The bytes to decode
+            
+        Returns:
+            The decoded text
+        """
         try:
-            # First, try to find where the new_string appears
-            new_string_parts = new_string.split('\n')
-            first_line_of_new = new_string_parts[0]
+            return data.decode('utf-8')
+        except UnicodeDecodeError:
+            return data.decode('latin-1')
+    
+    def _read_file(self, file_path: str, file_stat: os.stat_result) -> Tuple[str, str]:
+        """
+        Read a file with a single read, detecting its encoding.
+        
+        Args:
+            file_path: The path to the file to read
+            file_stat: The result of os.stat on the file
             
-            # Find this line in the content
-            line_index = -1
-            for i, line in enumerate(lines):
-                if first_line_of_new in line:
-                    line_index = i
-                    break
+        Returns:
+            A tuple of (file content with normalized newlines, encoding)
+        """
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        
+        # An unchanged file we've seen before skips the encoding probe
+        cache_key = (file_path, file_stat.st_mtime_ns, file_stat.st_size)
+        encoding = self._encoding_cache.get(cache_key)
+        content = None
+        if encoding is not None:
+            self._encoding_cache.move_to_end(cache_key)
+            try:
+                content = raw.decode(encoding)
+            except UnicodeDecodeError:
+                # Changed without its mtime moving on; detect it again
+                content = None
+        
+        if content is None:
+            content, encoding = self._decode_file_bytes(raw)
+        
+        # Normalize newlines the same way text-mode reads do
+        if '\r' in content:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+        
+        return content, encoding
+    
+    def _decode_file_bytes(self, raw: bytes) -> Tuple[str, str]:
+        """
+        Decode the raw bytes of a file, detecting its encoding.
+        
+        Args:
+            raw: The bytes read from the file
+            
+        Returns:
+            A tuple of (file content, encoding)
+        """
+        # Keep a UTF-8 BOM on write-back, otherwise prefer UTF-8. latin-1
+        # decodes any byte sequence, so it is the final fallback.
+        if raw.startswith(codecs.BOM_UTF8):
+            return raw.decode('utf-8-sig'), 'utf-8-sig'
+        try:
+            return raw.decode('utf-8'), 'utf-8'
+        except UnicodeDecodeError:
+            return raw.decode('latin-1'), 'latin-1'
+    
+    def _write_file(self, file_path: str, content: str, encoding: str, file_stat: os.stat_result) -> None:
+        """
+        Write content back to a file using the encoding it was read with.
+        
+        Args:
+            file_path: The path to the file to write
+            content: The content to write
+            encoding: The encoding detected when the file was read
+            file_stat: The result of os.stat on the original file
+        """
+        try:
+            data = content.encode(encoding)
+        except UnicodeEncodeError:
+            # Fall back to UTF-8 if the edit added characters latin-1 can't hold
+            encoding = 'utf-8'
+            data = content.encode(encoding)
+        
+        new_stat = self._replace_file(file_path, file_stat, (data,))
+        
+        # Remember the encoding for the next edit of the new version
+        self._encoding_cache.pop((file_path, file_stat.st_mtime_ns, file_stat.st_size), None)
+        self._encoding_cache[(file_path, new_stat.st_mtime_ns, new_stat.st_size)] = encoding
+        if len(self._encoding_cache) > ENCODING_CACHE_SIZE:
+            self._encoding_cache.popitem(last=False)
+    
+    def _replace_file(self, file_path: str, file_stat: os.stat_result, chunks: Sequence[bytes],
+                      in_place_fallback: bool = True) -> Optional[os.stat_result]:
+        """
+        Replace a file with the given chunks of bytes.
+        
+        The chunks go to a temporary file in the same directory, which takes
+        the original's permissions, owner and group, is synced and then
+        replaces the original, so an interrupted write never leaves a
+        half-written file behind. Renaming would split a hard link or change
+        the owner, and it can be refused, e.g. for another user's file in a
+        sticky directory; the file is then rewritten in place instead.
+        
+        Args:
+            file_path: The path to the file to replace
+            file_stat: The result of os.stat on the original file
+            chunks: The bytes to write, in order
+            in_place_fallback: Whether the file may be rewritten in place when
+                it can't be replaced
             
-            # If we found it, create a window around it
-            if line_index >= 0:
-                start_line = max(0, line_index - n_lines_snippet)
-                end_line = min(len(lines), line_index + len(new_string_parts) + n_lines_snippet)
-                return '\n'.join(lines[start_line:end_line])
+        Returns:
+            The os.stat result of the new file, or None if the file couldn't be
+            replaced and in_place_fallback is False
+        """
+        # Replace the target of a symlink rather than the link itself
+        target_path = os.path.realpath(file_path)
+        
+        if self._can_replace(target_path, file_stat):
+            new_stat = self._replace_via_temp_file(target_path, file_stat, chunks)
+            if new_stat is not None:
+                return new_stat
+        
+        if not in_place_fallback:
+            return None
+        
+        with open(target_path, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+            return os.fstat(f.fileno())
+    
+    def _replace_via_temp_file(self, target_path: str, file_stat: os.stat_result,
+                               chunks: Sequence[bytes]) -> Optional[os.stat_result]:
+        """
+        Write the chunks to a temporary file and rename it over the target.
+        
+        Args:
+            target_path: The resolved path of the file
+            file_stat: The result of os.stat on the original file
+            chunks: The bytes to write, in order
             
-            # If we couldn't find it, just return a reasonable chunk from the start
-            return '\n'.join(lines[:n_lines_snippet * 2])
+        Returns:
+            The os.stat result of the new file, or None if the original owner
+            couldn't be kept or the rename was refused
+        """
+        # mkstemp creates the file exclusively under an unpredictable name
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(target_path),
+            prefix=f".{os.path.basename(target_path)}.",
+            suffix=".tmp"
+        )
+        replaced = False
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                
+                # Keep the original file's permissions, owner and group
+                os.fchmod(f.fileno(), stat.S_IMODE(file_stat.st_mode))
+                try:
+                    os.fchown(f.fileno(), file_stat.st_uid, file_stat.st_gid)
+                except PermissionError:
+                    return None
+                f.flush()
+                os.fsync(f.fileno())
+                new_stat = os.fstat(f.fileno())
             
-        except Exception:
-            # Fallback to just showing the first few lines
-            return '\n'.join(lines[:n_lines_snippet * 2])
+            try:
+                os.replace(tmp_path, target_path)
+            except PermissionError:
+                return None
+            replaced = True
+        finally:
+            if not replaced and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        
+        return new_stat
     
-    def _format_result(self, file_path: str, snippet: str) -> str:
+    def _can_replace(self, target_path: str, file_stat: os.stat_result) -> bool:
+        """
+        Check whether a file can be replaced by renaming a new file over it.
+        
+        Args:
+            target_path: The resolved path of the file
+            file_stat: The result of os.stat on the file
+            
+        Returns:
+            True if the file has no other hard links and files can be created
+            in its directory
+        """
+        if file_stat.st_nlink > 1:
+            return False
+        return os.access(os.path.dirname(target_path), os.W_OK | os.X_OK)
+    
+    def _get_snippet(self, new_content: str, edit_offset: int, new_string: str) -> Tuple[str, int]:
+        """
+        Get a snippet of the modified file around the edit point.
+        
+        Args:
+            new_content: The content of the modified file
+            edit_offset: The offset in new_content where new_string was inserted
+            new_string: The string that was inserted
+            
+        Returns:
+            A tuple of (snippet of the modified file, line number of its first line)
+        """
+        # Number of context lines before/after the change
+        n_lines_snippet = SNIPPET_CONTEXT_LINES
+        
+        # Show the whole file if it's short enough
+        if new_content.count('\n') < n_lines_snippet * 2:
+            return new_content, 1
+        
+        # Work out the window from offsets so the whole file is never split
+        edit_line = new_content.count('\n', 0, edit_offset)
+        first_line = max(0, edit_line - n_lines_snippet)
+        
+        # Step back to the start of the first line in the window
+        start = new_content.rfind('\n', 0, edit_offset)
+        for _ in range(edit_line - first_line):
+            start = new_content.rfind('\n', 0, start)
+        start += 1
+        
+        # Step forward past the inserted lines plus the trailing context
+        end = edit_offset - 1
+        for _ in range(new_string.count('\n') + 1 + n_lines_snippet):
+            end = new_content.find('\n', end + 1)
+            if end < 0:
+                end = len(new_content)
+                break
+        
+        return new_content[start:end], first_line + 1
+    
+    def _format_result(self, file_path: str, snippet: str, start_line: int = 1) -> str:
         """
         Format the result message with the edited file details.
         
         Args:
             file_path: The path to the file that was modified
             snippet: A snippet of the modified file
+            start_line: The line number of the first line of the snippet
             
         Returns:
             A formatted result message
         """
         # Add line numbers to the snippet
-        numbered_snippet = self._add_line_numbers(snippet)
+        numbered_snippet = self._add_line_numbers(snippet, start_line)
         
         return f"The file {file_path} has been updated. Here's the result of running `cat -n` on a snippet of the edited file:\n{numbered_snippet}"
     
@@ -285,14 +576,21 @@ GENERAL EDITING GUIDELINES
         Returns:
             Content with line numbers
         """
-        lines = content.split('\n')
-        result = []
+        return self._add_line_numbers_to_lines(content.split('\n'), start_line)
+    
+    def _add_line_numbers_to_lines(self, lines: Iterable[str], start_line: int = 1) -> str:
+        """
+        Add line numbers to already split lines.
         
-        for i, line in enumerate(lines):
-            line_number = start_line + i
-            result.append(f"{line_number:6d}\t{line}")
+        Args:
+            lines: The lines to add line numbers to
+            start_line: The line number to start from
             
-        return '\n'.join(result)
+        Returns:
+            The lines joined with line numbers
+        """
+        # %-formatting mapped over (number, line) pairs runs the whole loop in C
+        return '\n'.join(map('%6d\t%s'.__mod__, zip(itertools.count(start_line), lines)))
 
 
 # Export the tool as an instance that can be directly used
@@ -11,7 +11,7 @@ import unittest
 import json
 from typing import Dict, Any
 
-from smolcc.tools.bash_tool import bash_tool
+from smolcc.tools.bash_tool import bash_tool, MAX_OUTPUT_CHARS
 from smolcc.tool_output import ToolOutput, TextOutput
 
 # Constants
@@ -97,6 +97,65 @@ class BashToolTests(unittest.TestCase):
             found = any(file in line for line in all_actual_lines)
             self.assertTrue(found, f"File '{file}' not found in directory listing results")
 
+    def test_banned_command(self):
+        """Test that banned commands are rejected, including with a path or different case."""
+        for command in ["curl http://example.com", "/usr/bin/wget http://example.com", "CURL http://example.com"]:
+            result = bash_tool.forward(command=command, timeout=5000)
+            self.assertIsInstance(result, ToolOutput)
+            self.assertTrue(str(result).startswith("Error: Command contains one or more banned commands"), command)
+
+    def test_timeout_clears_exit_code(self):
+        """Test that a timed-out command doesn't report the previous command's exit code."""
+        bash_tool.forward(command="false", timeout=5000)
+        self.assertEqual(bash_tool.last_exit_code, 1)
+        
+        result = bash_tool.forward(command="sleep 5", timeout=500)
+        self.assertIn("timed out", str(result))
+        self.assertIsNone(bash_tool.last_exit_code)
+
+    def test_shell_exit_restarts_shell(self):
+        """Test that the command after an exiting shell runs in a fresh shell."""
+        result = bash_tool.forward(command="exit 3", timeout=5000)
+        self.assertEqual(str(result), "Error: The shell process exited unexpectedly")
+        
+        result = bash_tool.forward(command="echo restarted", timeout=5000)
+        self.assertEqual(str(result), "restarted")
+
+    def test_large_stderr_is_truncated(self):
+        """Test that output written to stderr is held to the same size limit."""
+        result = bash_tool.forward(command="python3 -c \"import sys; sys.stderr.write('e' * 100000)\"", timeout=5000)
+        self.assertIn("lines truncated", str(result))
+        self.assertLess(len(str(result)), MAX_OUTPUT_CHARS + 100)
+
+    def test_large_multibyte_output_is_truncated(self):
+        """Test that output over the limit in bytes but not in characters is kept whole."""
+        command = "python3 -c \"print(('\u00e9' * 1000 + '\\n') * 20, end='THE_END')\""
+        result = str(bash_tool.forward(command=command, timeout=5000))
+        self.assertTrue(result.endswith("THE_END"))
+        self.assertNotIn("lines truncated", result)
+        
+        # Over the limit in characters, it is truncated with a notice
+        command = "python3 -c \"print(('\u00e9' * 1000 + '\\n') * 40, end='THE_END')\""
+        result = str(bash_tool.forward(command=command, timeout=5000))
+        self.assertIn("lines truncated", result)
+        self.assertLess(len(result), MAX_OUTPUT_CHARS + 100)
+
+    def test_banned_command_positions(self):
+        """Test that banned names are only rejected where they run as commands."""
+        for command in [
+            "ls | xargs curl", "echo $(wget -q -O- x)", "bash -c 'curl x'", "FOO=1 nc -l 8080",
+            "find . -exec curl {} \\;", "fd -x wget", "busybox wget x", "parallel curl ::: a",
+            "ssh host curl x", "ssh host 'curl x'", "su -c 'curl x'", "doas curl x",
+            "chroot /srv curl x", "setsid wget x", "flock /tmp/lock curl x",
+            "function f { curl x; }", "f() { wget x; }",
+            ">out curl x", "2>/dev/null wget x", "</dev/null curl x", "&>log curl x",
+            "2>&1 curl x", "cat <(curl x)", "echo > \"$(curl x)\"",
+            "time -p curl x", "coproc curl x",
+        ]:
+            self.assertTrue(bash_tool._is_banned_command(command), command)
+        for command in ["echo \"curl\"", "grep curl notes.txt", "git log --grep=wget", "ls >curl", "echo x 2>&1 >wget"]:
+            self.assertFalse(bash_tool._is_banned_command(command), command)
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -10,6 +10,7 @@ import os
 import unittest
 import tempfile
 import shutil
+from unittest import mock
 from typing import Dict, Any
 
 import sys
@@ -48,6 +49,33 @@ EXPECTED_PATTERNS = {
             "console.log(`Hello ${name}`)",
             "sayHello('World')"
         ]
+    },
+    "modify_long_file_snippet": {
+        "inputs": {
+            "file_path": "",  # Will be set dynamically
+            "old_string": "line 15",
+            "new_string": "line fifteen"
+        },
+        "expected_patterns": [
+            "has been updated",
+            "    11\tline 11",
+            "    15\tline fifteen",
+            "    19\tline 19"
+        ],
+        "unexpected_patterns": [
+            "line 10",
+            "line 20"
+        ]
+    },
+    "duplicate_old_string": {
+        "inputs": {
+            "file_path": "",  # Will be set dynamically
+            "old_string": "console.log",
+            "new_string": "console.info"
+        },
+        "expected_patterns": [
+            "Error: The specified text appears 2 times in the file"
+        ]
     }
 }
 
@@ -64,6 +92,8 @@ class EditToolTests(unittest.TestCase):
         # Set dynamic file paths
         EXPECTED_PATTERNS["create_new_file"]["inputs"]["file_path"] = os.path.join(TEMP_DIR, "test_edit.txt")
         EXPECTED_PATTERNS["modify_file_with_context"]["inputs"]["file_path"] = os.path.join(TEMP_DIR, "test_edit_modify.txt")
+        EXPECTED_PATTERNS["modify_long_file_snippet"]["inputs"]["file_path"] = os.path.join(TEMP_DIR, "test_edit_long.txt")
+        EXPECTED_PATTERNS["duplicate_old_string"]["inputs"]["file_path"] = os.path.join(TEMP_DIR, "test_edit_duplicate.txt")
         
     @classmethod
     def tearDownClass(cls):
@@ -116,6 +146,202 @@ class EditToolTests(unittest.TestCase):
             content = f.read()
             self.assertEqual(content, test_data["inputs"]["new_string"])
 
+    def test_modify_long_file_snippet(self):
+        """Test that the snippet for a long file is a numbered window around the edit."""
+        test_data = EXPECTED_PATTERNS["modify_long_file_snippet"]
+        
+        # Create a file long enough that only a window is shown
+        with open(test_data["inputs"]["file_path"], 'w') as f:
+            f.write("\n".join(f"line {i}" for i in range(1, 31)))
+        
+        # Run the tool
+        result = file_edit_tool.forward(**test_data["inputs"])
+        
+        # Check that the snippet shows the edit with the correct line numbers
+        for pattern in test_data["expected_patterns"]:
+            self.assertIn(pattern, result)
+        for pattern in test_data["unexpected_patterns"]:
+            self.assertNotIn(pattern, result)
+
+    def test_duplicate_old_string(self):
+        """Test that an old_string occurring more than once is rejected."""
+        test_data = EXPECTED_PATTERNS["duplicate_old_string"]
+        original_content = "console.log('a');\nconsole.log('b');\n"
+        
+        with open(test_data["inputs"]["file_path"], 'w') as f:
+            f.write(original_content)
+        
+        # Run the tool
+        result = file_edit_tool.forward(**test_data["inputs"])
+        
+        # Check that the error is reported
+        for pattern in test_data["expected_patterns"]:
+            self.assertIn(pattern, result)
+        
+        # Check that the file was left untouched
+        with open(test_data["inputs"]["file_path"], 'r') as f:
+            self.assertEqual(f.read(), original_content)
+
+    def test_modify_latin1_file_keeps_encoding(self):
+        """Test that a non-UTF-8 file is written back in its original encoding."""
+        file_path = os.path.join(TEMP_DIR, "test_edit_latin1.txt")
+        with open(file_path, 'wb') as f:
+            f.write("café = 1\n".encode('latin-1'))
+        
+        # Run the tool
+        result = file_edit_tool.forward(file_path=file_path, old_string="= 1", new_string="= 2")
+        self.assertIn("has been updated", result)
+        
+        # Check that the file is still latin-1 encoded
+        with open(file_path, 'rb') as f:
+            self.assertEqual(f.read(), "café = 2\n".encode('latin-1'))
+
+    def test_repeat_edits_reuse_detected_encoding(self):
+        """Test that the encoding detected for a file is remembered for its next edit."""
+        file_path = os.path.join(TEMP_DIR, "test_edit_latin1_repeat.txt")
+        with open(file_path, 'wb') as f:
+            f.write("café = 1\n".encode('latin-1'))
+
+        # Run the tool twice on the same file
+        file_edit_tool.forward(file_path=file_path, old_string="= 1", new_string="= 2")
+        st = os.stat(file_path)
+        self.assertEqual(file_edit_tool._encoding_cache.get((file_path, st.st_mtime_ns, st.st_size)), 'latin-1')
+        result = file_edit_tool.forward(file_path=file_path, old_string="= 2", new_string="= 3")
+        self.assertIn("has been updated", result)
+
+        with open(file_path, 'rb') as f:
+            self.assertEqual(f.read(), "café = 3\n".encode('latin-1'))
+
+    def test_modify_preserves_permissions(self):
+        """Test that replacing the file via a temporary copy keeps its permissions."""
+        file_path = os.path.join(TEMP_DIR, "test_edit_script.sh")
+        with open(file_path, 'w') as f:
+            f.write("echo hello\n")
+        os.chmod(file_path, 0o755)
+        
+        # Run the tool
+        result = file_edit_tool.forward(file_path=file_path, old_string="hello", new_string="world")
+        self.assertIn("has been updated", result)
+        
+        # Check the content, the mode, and that no temporary file was left behind
+        with open(file_path, 'r') as f:
+            self.assertEqual(f.read(), "echo world\n")
+        self.assertEqual(os.stat(file_path).st_mode & 0o777, 0o755)
+        self.assertEqual([name for name in os.listdir(TEMP_DIR) if ".tmp." in name], [])
+
+    def test_path_under_a_file(self):
+        """Test that a path whose parent is a regular file is reported as missing."""
+        parent_path = EXPECTED_PATTERNS["modify_file_with_context"]["inputs"]["file_path"]
+        file_path = os.path.join(parent_path, "child.txt")
+        
+        # Run the tool
+        result = file_edit_tool.forward(file_path=file_path, old_string="a", new_string="b")
+        
+        self.assertEqual(result, f"Error: File '{file_path}' does not exist")
+
+    def test_modify_in_place_when_directory_is_read_only(self):
+        """Test that a writable file in a read-only directory is rewritten in place."""
+        file_path = os.path.join(TEMP_DIR, "test_edit_in_place.txt")
+        with open(file_path, 'w') as f:
+            f.write("value = 1\n")
+        inode = os.stat(file_path).st_ino
+        
+        # Run the tool as if the directory couldn't take a temporary file
+        with mock.patch.object(file_edit_tool, "_can_replace", return_value=False):
+            result = file_edit_tool.forward(file_path=file_path, old_string="= 1", new_string="= 2")
+        self.assertIn("has been updated", result)
+        
+        # Same file, new content
+        self.assertEqual(os.stat(file_path).st_ino, inode)
+        with open(file_path, 'r') as f:
+            self.assertEqual(f.read(), "value = 2\n")
+
+    def test_modify_hard_linked_file_in_place(self):
+        """Test that a file with another hard link is rewritten in place so the link sees the edit."""
+        file_path = os.path.join(TEMP_DIR, "test_edit_linked.txt")
+        link_path = os.path.join(TEMP_DIR, "test_edit_linked_other.txt")
+        with open(file_path, 'w') as f:
+            f.write("value = 1\n")
+        os.link(file_path, link_path)
+
+        # Run the tool
+        result = file_edit_tool.forward(file_path=file_path, old_string="= 1", new_string="= 2")
+        self.assertIn("has been updated", result)
+
+        # Both names still refer to the edited file
+        self.assertTrue(os.path.samefile(file_path, link_path))
+        with open(link_path, 'r') as f:
+            self.assertEqual(f.read(), "value = 2\n")
+
+    def test_modify_in_place_when_rename_is_refused(self):
+        """Test that a refused rename, as in a sticky directory, falls back to rewriting in place."""
+        file_path = os.path.join(TEMP_DIR, "test_edit_sticky.txt")
+        with open(file_path, 'w') as f:
+            f.write("value = 1\n")
+        inode = os.stat(file_path).st_ino
+
+        # Run the tool as if the directory refused the rename
+        with mock.patch("os.replace", side_effect=PermissionError(1, "Operation not permitted")):
+            result = file_edit_tool.forward(file_path=file_path, old_string="= 1", new_string="= 2")
+        self.assertIn("has been updated", result)
+
+        # Same file, new content, and no temporary file left behind
+        self.assertEqual(os.stat(file_path).st_ino, inode)
+        with open(file_path, 'r') as f:
+            self.assertEqual(f.read(), "value = 2\n")
+        self.assertEqual([name for name in os.listdir(TEMP_DIR) if ".tmp" in name], [])
+
+    @unittest.skipUnless(hasattr(os, "geteuid") and os.geteuid() == 0, "changing the owner needs root")
+    def test_modify_preserves_owner(self):
+        """Test that replacing the file via a temporary copy keeps its owner and group."""
+        file_path = os.path.join(TEMP_DIR, "test_edit_owned.txt")
+        with open(file_path, 'w') as f:
+            f.write("value = 1\n")
+        os.chown(file_path, 12345, 23456)
+
+        # Run the tool
+        result = file_edit_tool.forward(file_path=file_path, old_string="= 1", new_string="= 2")
+        self.assertIn("has been updated", result)
+
+        st = os.stat(file_path)
+        self.assertEqual((st.st_uid, st.st_gid), (12345, 23456))
+        with open(file_path, 'r') as f:
+            self.assertEqual(f.read(), "value = 2\n")
+
+    def test_create_long_file_snippet(self):
+        """Test that creating a long file only shows the first lines in the snippet."""
+        file_path = os.path.join(TEMP_DIR, "test_edit_new_long.txt")
+        new_string = "\n".join(f"line {i}" for i in range(1, 31))
+        
+        # Run the tool
+        result = file_edit_tool.forward(file_path=file_path, old_string="", new_string=new_string)
+        
+        self.assertIn("     8\tline 8", result)
+        self.assertNotIn("line 9", result)
+        
+        # The whole file is still written
+        with open(file_path, 'r') as f:
+            self.assertEqual(f.read(), new_string)
+
+    def test_modify_large_file(self):
+        """Test that an edit to a file above the memory-map threshold matches a regular edit."""
+        file_path = os.path.join(TEMP_DIR, "test_edit_large.txt")
+        content = "".join(f"line {i} café\n" for i in range(1, 120001))
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+        # Run the tool
+        result = file_edit_tool.forward(file_path=file_path, old_string="line 60000 ", new_string="edited\n")
+
+        self.assertIn(" 59996\tline 59996 café", result)
+        self.assertIn(" 60000\tedited", result)
+        self.assertIn(" 60001\tcafé", result)
+        self.assertIn(" 60005\tline 60004 café", result)
+        self.assertNotIn("line 60005 ", result)
+
+        with open(file_path, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), content.replace("line 60000 ", "edited\n", 1))
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file